@@ -39,20 +39,31 @@ def render():
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                # Prepare messages
-                messages_for_llm = [{"role": m["role"], "content": m["content"]} for m in st.session_state.ph1_messages]
-                
-                try:
-                    response = LLMEngine.chat(selected_model, messages_for_llm, temperature)
-                    full_response = response if response else "No response received."
-                except Exception as e:
-                    import traceback
-                    error_msg = f"Chat Error: {type(e).__name__}: {e}"
-                    print(f"[CHAT_INTERFACE] {error_msg}")
-                    traceback.print_exc()
-                    full_response = error_msg
+            # Prepare messages
+            messages_for_llm = [{"role": m["role"], "content": m["content"]} for m in st.session_state.ph1_messages]
+            
+            try:
+                # Stream tokens as they arrive instead of waiting for the whole completion
+                with st.spinner("Thinking..."):
+                    response = LLMEngine.chat(selected_model, messages_for_llm, temperature, stream=True)
                 
+                if isinstance(response, str):
+                    # LLMEngine.chat reports failures as an "Error: ..." string
+                    st.markdown(response)
+                    full_response = response
+                else:
+                    full_response = st.write_stream(
+                        chunk.choices[0].delta.content or "" for chunk in response
+                    )
+                    if not full_response:
+                        full_response = "No response received."
+                        st.markdown(full_response)
+            except Exception as e:
+                import traceback
+                error_msg = f"Chat Error: {type(e).__name__}: {e}"
+                print(f"[CHAT_INTERFACE] {error_msg}")
+                traceback.print_exc()
+                full_response = error_msg
                 st.markdown(full_response)
         
         st.session_state.ph1_messages.append({"role": "assistant", "content": full_response})
@@ -1,9 +1,13 @@
 import typer
 import questionary
 import asyncio
+import atexit
+from typing import Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.style import Style
+from rich.text import Text
 from app.core.config import settings
 from app.services import prompt_engine
 from app.services.rag_engine import RAGEngine
@@ -11,8 +15,14 @@ from app.services.qa_engine import QAEngine
 from app.services.cocoindex_service import CocoIndexService
 from app.services.vector_store import VectorStore
 from app.services.model_registry import ModelRegistry
+from app.services.ai_providers import AIServiceFactory
 from app.models.schemas import PromptRequest
 
+try:
+    import uvloop  # Faster event loop; installed by uvicorn[standard], not available on Windows
+except ImportError:
+    uvloop = None
+
 console = Console()
 app = typer.Typer()
 
@@ -36,7 +46,7 @@ async def direct_ai_menu():
             if q:
                 with console.status("[bold green]Ask Model 1..."):
                     response = await prompt_engine.call_model_1(PromptRequest(user_query=q))
-                console.print(Panel(response.content, title=f"Response ({response.model_name})", border_style="blue"))
+                console.print(Panel(Text(response.content), title=f"Response ({response.model_name})", border_style="blue"))
         
         elif choice == "Chain of Thought (Model 2 -> 1)":
             q = await questionary.text("Enter your question:").ask_async()
@@ -44,16 +54,18 @@ async def direct_ai_menu():
                 with console.status("[bold purple]Reasoning..."):
                     response = await prompt_engine.generate_chain_of_thought_response(PromptRequest(user_query=q))
                 for step in response.steps:
-                    console.print(Panel(step['content'], title=step['title'], border_style=step.get('style', 'white')))
+                    console.print(Panel(Text(step.content), title=step.title, border_style=step.style))
 
         elif choice == "Specific Model Slot":
             slot = await questionary.select("Select Slot", choices=["Slot 1", "Slot 2"]).ask_async()
+            if not slot:
+                continue
+            slot_id = 1 if slot == "Slot 1" else 2
             q = await questionary.text("Enter your question:").ask_async()
             if q:
-                slot_id = 1 if slot == "Slot 1" else 2
                 with console.status(f"[bold cyan]Ask Model {slot_id}..."):
                     response = await prompt_engine.call_specific_model_by_slot(slot_id, PromptRequest(user_query=q))
-                console.print(Panel(response.content, title=f"Response ({response.model_name})", border_style="cyan"))
+                console.print(Panel(Text(response.content), title=f"Response ({response.model_name})", border_style="cyan"))
         
         console.print("") # easy spacing
 
@@ -154,7 +166,7 @@ async def basic_rag_menu():
                 with console.status(f"[bold blue]Retrieving & Thinking ({slot_name})..."):
                     try:
                         response = await RAGEngine.generate_rag_response(q, model_slot=RAG_MODEL_SLOT, history=chat_history)
-                        console.print(Panel(response.content, title=f"RAG Answer ({response.model_name})", border_style="green"))
+                        console.print(Panel(Text(response.content), title=f"RAG Answer ({response.model_name})", border_style="green"))
                         
                         # Update History
                         chat_history.append({"role": "user", "content": q})
@@ -230,7 +242,7 @@ async def multisource_qa_menu():
             
             if selected:
                 with console.status(f"[bold yellow]Ingesting PDFs to {current_provider} Collection..."):
-                    results = QAEngine.ingest_files(selected)
+                    results = await QAEngine.ingest_files(selected)
                 
                 console.print("\n[bold]Ingestion Results:[/bold]")
                 for fname, res in results.items():
@@ -256,7 +268,7 @@ async def multisource_qa_menu():
                     try:
                         qa_response = await QAEngine.ask(q, model_slot=QA_MODEL_SLOT)
                         formatted = QAEngine.format_response_with_sources(qa_response)
-                        console.print(Panel(formatted, title=f"Answer ({qa_response.model_name})", border_style="green"))
+                        console.print(Panel(Text(formatted), title=f"Answer ({qa_response.model_name})", border_style="green"))
                     except Exception as e:
                         console.print(f"[red]Error: {e}[/red]")
 
@@ -507,6 +519,16 @@ async def main_loop():
     embeds = registry.get_available_embeddings()
     console.print(f"[dim]Found {len(llms)} LLMs and {len(embeds)} embedding models.[/dim]\n")
     
+    # Build both slots' provider clients once, so the first question doesn't pay for it
+    results = await asyncio.gather(
+        prompt_engine.warmup_slot(1),
+        prompt_engine.warmup_slot(2),
+        return_exceptions=True
+    )
+    for slot, result in enumerate(results, start=1):
+        if isinstance(result, Exception):
+            console.print(f"[dim]Warmup of model slot {slot} skipped: {result}[/dim]")
+    
     console.print(Panel(f"[bold blue]Welcome to {settings.PROJECT_NAME} TUI[/bold blue]", expand=False))
     
     while True:
@@ -539,9 +561,73 @@ async def main_loop():
             console.print(f"[red]Application Error: {e}[/red]")
             break
 
+# One asyncio.Runner (and so one event loop and default thread pool) shared by every
+# command run in this process, so pooled provider HTTP clients are reused instead of rebuilt
+_runner: Optional[asyncio.Runner] = None
+
+
+def _close_runner():
+    _runner.run(AIServiceFactory.aclose_all())
+    _runner.close()
+
+
+def _run(coro):
+    """Run a coroutine on the shared runner, creating it on first use."""
+    global _runner
+    if _runner is None:
+        _runner = asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None)
+        atexit.register(_close_runner)
+    return _runner.run(coro)
+
+
 @app.command()
 def start():
-    asyncio.run(main_loop())
+    _run(main_loop())
+
+
+# Styles for batch_ask output, parsed once rather than per panel
+_ANSWER_STYLE = Style.parse("blue")
+_ERROR_STYLE = Style.parse("red")
+
+
+async def _batch_ask(questions: list, slot: int, concurrency: int, rpm: int):
+    registry = ModelRegistry.instance()
+    registry.initialize(
+        gemini_api_key=settings.GEMINI_API_KEY,
+        ollama_base_url=settings.OLLAMA_BASE_URL
+    )
+    with console.status(f"[bold green]Asking {len(questions)} questions (Model {slot})..."):
+        responses = await prompt_engine.generate_batch(
+            [PromptRequest(user_query=q) for q in questions],
+            slot=slot,
+            max_concurrency=concurrency,
+            requests_per_minute=rpm or None,
+            return_exceptions=True
+        )
+    # Build every panel first and render them in a single print
+    panels = []
+    for q, response in zip(questions, responses):
+        if isinstance(response, BaseException):
+            panels.append(Panel(Text(str(response)), title=Text(q), border_style=_ERROR_STYLE, style=_ERROR_STYLE))
+        else:
+            panels.append(Panel(Text(response.content), title=Text(f"{q} ({response.model_name})"), border_style=_ANSWER_STYLE))
+    console.print(*panels)
+
+
+@app.command()
+def batch_ask(
+    file: str,
+    slot: int = typer.Option(1, help="Model slot to ask (1 or 2)"),
+    concurrency: int = typer.Option(10, help="Maximum requests in flight"),
+    rpm: int = typer.Option(100, help="Maximum requests started per minute (0 = unlimited)")
+):
+    """Ask every question in FILE (one per line) concurrently."""
+    with open(file, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    if not questions:
+        console.print("[yellow]No questions found.[/yellow]")
+        return
+    _run(_batch_ask(questions, slot, concurrency, rpm))
 
 if __name__ == "__main__":
     app()
@@ -7,6 +7,10 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     API_PREFIX: str = "/api/v1"
 
+    # API server bind address (set HOST=0.0.0.0 inside containers)
+    HOST: str = "localhost"
+    PORT: int = 8000
+
     # Secrets (Loaded from .env file)
     GEMINI_API_KEY: Optional[str] = None
 
@@ -16,6 +20,14 @@ class Settings(BaseSettings):
     # Vector Configuration
     CHROMA_DB_PATH: str = "./data/chroma_db"
     SOURCE_DOCUMENTS_DIR: str = "./data/source_documents"
+
+    # Provider-side prompt caching of long system prompts (Gemini context caching; each entry is billed storage)
+    ENABLE_PROMPT_CACHE: bool = False
+
+    # Semantic Cache (skips LLM calls for near-duplicate prompts; each call pays an extra embedding)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MAX_DISTANCE: float = 0.1  # Cosine distance
+    SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 60 * 60
     
     # Model Configuration - NOW DYNAMIC
     # Models are discovered at runtime via ModelRegistry.
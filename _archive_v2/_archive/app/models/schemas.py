@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Dict
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Tuple
 
 # Basic Input for Prompting
 class PromptRequest(BaseModel):
@@ -11,6 +12,13 @@ class PromptRequest(BaseModel):
     model_slot: int = 1  # Default to Model 1
     history: Optional[List[Dict[str, str]]] = None  # Conversation history [{"role": "user"|"model", "content": "..."}]
 
+# A single rendered step of a multi-step (e.g. Chain of Thought) response
+@dataclass(slots=True)
+class CoTStep:
+    title: str
+    content: str
+    style: str
+
 # Basic Output
 class AIResponse(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
@@ -18,4 +26,4 @@ class AIResponse(BaseModel):
     content: str
     tokens_used: int
     model_name: str
-    steps: Optional[List[Dict[str, str]]] = None
\ No newline at end of file
+    steps: Optional[Tuple[CoTStep, ...]] = None
\ No newline at end of file
@@ -14,6 +14,20 @@ class RAGQueryRequest(BaseModel):
 class IngestRequest(BaseModel):
     filenames: Optional[List[str]] = None  # If None, ingest all NEW files
 
+# Declared response models let FastAPI serialize straight to JSON bytes via pydantic-core
+class IngestResponse(BaseModel):
+    message: str
+    results: Dict[str, str]  # filename -> status
+
+class StatusCounts(BaseModel):
+    ingested: int
+    total: int
+
+class StatusResponse(BaseModel):
+    collection: str
+    counts: StatusCounts
+    files: List[Dict[str, str]]  # [{"name": ..., "status": "INGESTED" | "NEW"}]
+
 @router.post("/query", response_model=AIResponse)
 async def query_rag(request: RAGQueryRequest):
     """
@@ -28,7 +42,7 @@ async def query_rag(request: RAGQueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/ingest")
+@router.post("/ingest", response_model=IngestResponse)
 async def ingest_documents(request: IngestRequest):
     """
     Ingest documents from the source directory.
@@ -55,7 +69,7 @@ async def ingest_documents(request: IngestRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/status")
+@router.get("/status", response_model=StatusResponse)
 async def get_status():
     """
     Get the status of files in the current provider's collection.
@@ -1,16 +1,23 @@
 import httpx
+import time
+import hashlib
+import functools
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any, Union, Tuple
-from dataclasses import dataclass
-from google import genai
-from google.genai import types as genai_types
+from dataclasses import dataclass, field
 from app.core.config import settings
 from app.core.exceptions import AIModelError
 from app.models.schemas import PromptRequest, AIResponse
 
 # --- Data Structures ---
 
-@dataclass
+# ModelInfo.tags bit flags
+MODEL_TAG_FLASH = 1
+MODEL_TAG_LITE = 2
+MODEL_TAG_LATEST = 4
+
+@dataclass(slots=True)
 class ModelInfo:
     """Information about a discovered model."""
     urn: str            # "ollama/gemma:2b"
@@ -19,6 +26,17 @@ class ModelInfo:
     type: str           # "llm" or "embedding"
     size_gb: Optional[float] = None
     params: Optional[str] = None
+    name_lower: str = field(init=False, default="")  # Derived in __post_init__
+    tags: int = field(init=False, default=0)         # Bitfield of MODEL_TAG_* flags, derived in __post_init__
+
+    def __post_init__(self):
+        # Precompute once so registry preference checks are attribute reads
+        self.name_lower = self.name.lower()
+        self.tags = (
+            (MODEL_TAG_FLASH if "flash" in self.name_lower else 0)
+            | (MODEL_TAG_LITE if "lite" in self.name_lower else 0)
+            | (MODEL_TAG_LATEST if "latest" in self.name_lower else 0)
+        )
 
 def parse_model_urn(urn: str) -> Tuple[str, str]:
     """
@@ -60,16 +78,50 @@ class AIProvider(IGenerative, IEmbedder):
     def discover_models(self) -> List[ModelInfo]:
         pass
 
+    def warmup(self) -> None:
+        """Build any lazily-created clients ahead of the first request."""
+        pass
+
+    async def aclose(self) -> None:
+        """Close pooled clients (they are bound to the event loop that created them)."""
+        pass
+
+    async def preload_model(self, model_name: str) -> None:
+        """Get a model ready to serve (e.g. load a local model into memory)."""
+        pass
+
 
 # --- Implementations ---
 
+# Gemini explicit context caching only accepts prompts above a minimum token
+# count (~1k+ tokens), so shorter system prompts are sent inline.
+PROMPT_CACHE_MIN_CHARS = 4096
+PROMPT_CACHE_TTL_SECONDS = 3600
+# Most system prompts tracked per service (seen once / cached); least recently used are forgotten
+PROMPT_CACHE_MAX_ENTRIES = 256
+
+@functools.lru_cache(maxsize=1)
+def _get_gemini_client(api_key: str):
+    """Import the Gemini SDK and build its client on first use (the import is heavy)."""
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
 class GeminiService(AIProvider):
     def __init__(self, api_key: str):
-        if not api_key:
-             # We allow init without key, but methods might fail or discovery returns empty
-             self.client = None
-        else:
-            self.client = genai.Client(api_key=api_key)
+        # We allow init without key, but methods might fail or discovery returns empty
+        self.api_key = api_key
+        # hash(model, system prompt) -> (cached content name or None, expiry timestamp)
+        self._prompt_caches: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        # Hashes of long system prompts seen once; a cache is only created on a repeat
+        self._prompt_seen: "OrderedDict[str, None]" = OrderedDict()
+
+    @property
+    def client(self):
+        return _get_gemini_client(self.api_key) if self.api_key else None
+
+    def warmup(self) -> None:
+        self.client
 
     @property
     def provider_name(self) -> str:
@@ -107,16 +159,64 @@ class GeminiService(AIProvider):
         return models
 
     # -- Generation --
+    async def _get_prompt_cache(self, model_name: str, system_role: str) -> Optional[str]:
+        """
+        Get (or create) a Gemini cached-content entry holding this system prompt,
+        so repeated calls with the same prefix are billed at the cached rate.
+        A cache is only created the second time a prompt is seen, since a
+        one-off prompt would pay for storage it never uses.
+        Returns None when caching is disabled, not applicable, or failed.
+        """
+        if not settings.ENABLE_PROMPT_CACHE or len(system_role) < PROMPT_CACHE_MIN_CHARS:
+            return None
+        
+        key = self._prompt_cache_key(model_name, system_role)
+        cached = self._prompt_caches.get(key)
+        if cached and cached[1] > time.time():
+            self._prompt_caches.move_to_end(key)
+            return cached[0]
+        if key not in self._prompt_seen and not cached:
+            self._remember(self._prompt_seen, key, None)
+            return None
+        self._prompt_seen.pop(key, None)
+        
+        from google.genai import types as genai_types
+        try:
+            cache = await self.client.aio.caches.create(
+                model=model_name,
+                config=genai_types.CreateCachedContentConfig(
+                    system_instruction=system_role,
+                    ttl=f"{PROMPT_CACHE_TTL_SECONDS}s"
+                )
+            )
+            name = cache.name
+        except Exception as e:
+            # Remember the failure too, so we don't retry on every call
+            print(f"⚠️ Gemini prompt cache unavailable ({model_name}): {e}")
+            name = None
+        # Refresh slightly before the server-side TTL runs out
+        self._remember(self._prompt_caches, key, (name, time.time() + PROMPT_CACHE_TTL_SECONDS - 60))
+        return name
+
+    @staticmethod
+    def _prompt_cache_key(model_name: str, system_role: str) -> str:
+        return hashlib.blake2b(f"{model_name}|{system_role}".encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _remember(entries: OrderedDict, key: str, value) -> None:
+        """Insert as most recently used, evicting the oldest entries beyond PROMPT_CACHE_MAX_ENTRIES."""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > PROMPT_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+
     async def generate_content(self, request: PromptRequest, model_name: str) -> AIResponse:
         if not self.client:
              raise AIModelError("Gemini API Key not configured.")
         
+        from google.genai import types as genai_types
         try:
-            config = genai_types.GenerateContentConfig(
-                temperature=request.temperature,
-                max_output_tokens=2048,
-                system_instruction=request.system_role
-            )
+            cache_name = await self._get_prompt_cache(model_name, request.system_role)
             # Prepare contents with history if available
             contents = []
             if request.history:
@@ -127,11 +227,32 @@ class GeminiService(AIProvider):
             # Add current query
             contents.append(genai_types.Content(role="user", parts=[genai_types.Part.from_text(text=request.user_query)]))
 
-            response = self.client.models.generate_content(
-                model=model_name,
-                contents=contents,
-                config=config
-            )
+            if cache_name:
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=model_name,
+                        contents=contents,
+                        config=genai_types.GenerateContentConfig(
+                            temperature=request.temperature,
+                            max_output_tokens=2048,
+                            cached_content=cache_name
+                        )
+                    )
+                except Exception as e:
+                    # The server-side cache may be gone before our local expiry: forget it and send the prompt inline
+                    print(f"⚠️ Gemini prompt cache {cache_name} failed, retrying inline: {e}")
+                    self._prompt_caches.pop(self._prompt_cache_key(model_name, request.system_role), None)
+                    cache_name = None
+            if not cache_name:
+                response = await self.client.aio.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=genai_types.GenerateContentConfig(
+                        temperature=request.temperature,
+                        max_output_tokens=2048,
+                        system_instruction=request.system_role
+                    )
+                )
             tokens_used = response.usage_metadata.total_token_count if response.usage_metadata else 0
             
             return AIResponse(
@@ -162,6 +283,40 @@ class GeminiService(AIProvider):
 class OllamaService(AIProvider):
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip('/')
+        # Pooled clients, created on first use and reused so calls share keep-alive connections
+        self._client = None
+        self._http: Optional[httpx.Client] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+
+    def get_client(self):
+        """Get the shared `ollama.Client` bound to this service's base URL."""
+        if self._client is None:
+            import ollama
+            self._client = ollama.Client(host=self.base_url)
+        return self._client
+
+    def _get_http(self) -> httpx.Client:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.Client(base_url=self.base_url, timeout=30.0)
+        return self._http
+
+    def _get_async_http(self) -> httpx.AsyncClient:
+        if self._async_http is None or self._async_http.is_closed:
+            self._async_http = httpx.AsyncClient(base_url=self.base_url, timeout=60.0)
+        return self._async_http
+
+    def warmup(self) -> None:
+        self._get_async_http()
+
+    async def preload_model(self, model_name: str) -> None:
+        # A generate request without a prompt just loads the model into memory
+        resp = await self._get_async_http().post("/api/generate", json={"model": model_name})
+        resp.raise_for_status()
+
+    async def aclose(self) -> None:
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
 
     @property
     def provider_name(self) -> str:
@@ -171,9 +326,7 @@ class OllamaService(AIProvider):
     def discover_models(self) -> List[ModelInfo]:
         models = []
         try:
-            import ollama
-            # Assuming env vars or default config for the library
-            response = ollama.list()
+            response = self.get_client().list()
             for m in response.models:
                 families = [f.lower() for f in (getattr(m.details, 'families', []) or [])]
                 is_embedding = 'embedding' in families or 'embed' in m.model.lower()
@@ -191,7 +344,6 @@ class OllamaService(AIProvider):
 
     # -- Generation --
     async def generate_content(self, request: PromptRequest, model_name: str) -> AIResponse:
-        url = f"{self.base_url}/api/chat"
         payload = {
             "model": model_name,
             "model": model_name,
@@ -212,10 +364,9 @@ class OllamaService(AIProvider):
         # Add current user query
         payload["messages"].append({"role": "user", "content": request.user_query})
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(url, json=payload, timeout=60.0)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = await self._get_async_http().post("/api/chat", json=payload)
+            resp.raise_for_status()
+            data = resp.json()
             
             content = data.get("message", {}).get("content", "")
             tokens = data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
@@ -225,15 +376,11 @@ class OllamaService(AIProvider):
 
     # -- Embedding --
     def embed_text(self, text: str, model_name: str) -> List[float]:
-        # Ollama python lib is sync, or use httpx for async/sync mixed. 
         # Interface is sync here for now to match legacy Validation.
-        # But wait, original code used httpx post.
         try:
-            # We can use httpx.post synchronously
-            response = httpx.post(
-                f"{self.base_url}/api/embeddings",
-                json={"model": model_name, "prompt": text},
-                timeout=30.0
+            response = self._get_http().post(
+                "/api/embeddings",
+                json={"model": model_name, "prompt": text}
             )
             response.raise_for_status()
             return response.json()["embedding"]
@@ -266,6 +413,12 @@ class AIServiceFactory:
         cls._instances[provider_name] = instance
         return instance
 
+    @classmethod
+    async def aclose_all(cls):
+        """Close the pooled clients of every provider created so far."""
+        for instance in cls._instances.values():
+            await instance.aclose()
+
     @classmethod
     def get_all_services(cls) -> List[AIProvider]:
         services = []
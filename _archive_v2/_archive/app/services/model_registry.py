@@ -3,20 +3,36 @@ Model Registry - Dynamic model discovery and selection.
 
 Discovers available models from Ollama and Gemini at startup,
 persists selections to JSON, and provides global model configuration.
+The discovered model list is cached alongside the selections so startup
+can serve it immediately while a background refresh revalidates it.
 """
 
 import os
-import json
+import atexit
+import threading
 from typing import List, Dict, Optional, Any
-from dataclasses import dataclass, asdict
-from datetime import datetime
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta
 from pathlib import Path
-from app.services.ai_providers import AIServiceFactory, ModelInfo
+import orjson
+from app.services.ai_providers import AIServiceFactory, ModelInfo, MODEL_TAG_FLASH, MODEL_TAG_LITE
 
 
 # Config file path
 CONFIG_FILE = Path("./data/model_config.json")
 
+# Cached model lists younger than this are served without re-discovery at startup
+DISCOVERY_TTL = timedelta(hours=1)
+
+# Back-to-back refresh requests within this window reuse the current list
+REFRESH_TTL = timedelta(seconds=5)
+
+# Setter calls within this window are coalesced into a single config write
+SAVE_DEBOUNCE_SECONDS = 0.2
+
+# ModelInfo fields written to the config file; derived fields are recomputed on load
+_PERSISTED_MODEL_FIELDS = frozenset(f.name for f in fields(ModelInfo) if f.init)
+
 
 class ModelRegistry:
     """
@@ -26,9 +42,13 @@ class ModelRegistry:
     """
     
     _instance: Optional["ModelRegistry"] = None
+    _lock = threading.Lock()
     
     def __init__(self):
         self._available_models: List[ModelInfo] = []
+        self._models_by_urn: Dict[str, ModelInfo] = {}
+        self._llms: List[ModelInfo] = []
+        self._embeddings: List[ModelInfo] = []
         self._config: Dict[str, Any] = {
             "llm_slot_1": None,
             "llm_slot_2": None,
@@ -36,12 +56,19 @@ class ModelRegistry:
             "last_discovery": None
         }
         self._initialized = False
+        self._save_pending = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Serializes _save_config writers (timer, refresh thread, callers)
+        atexit.register(self._flush_save)
     
     @classmethod
     def instance(cls) -> "ModelRegistry":
-        """Get or create the singleton instance."""
+        """Get or create the singleton instance (double-checked locking)."""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
     @classmethod
@@ -54,17 +81,33 @@ class ModelRegistry:
     def initialize(self, gemini_api_key: Optional[str] = None, ollama_base_url: str = "http://localhost:11434"):
         """
         Initialize the registry: load config, discover models, validate selections.
-        Call this at application startup.
+        Call this at application startup. Safe to call from several threads:
+        only the first caller runs discovery.
         """
         if self._initialized:
             return
         
+        with self._lock:
+            if self._initialized:
+                return
+            self._initialize(gemini_api_key, ollama_base_url)
+    
+    def _initialize(self, gemini_api_key: Optional[str], ollama_base_url: str):
+        """Initialization body; caller must hold the class lock."""
         # Ensure data directory exists
         CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
         
-        # Load saved config if exists
+        # Load saved config (and cached model list) if exists
         self._load_config()
         
+        if self._available_models:
+            # Serve the cached list immediately, revalidate in the background if stale
+            self._validate_and_set_defaults()
+            self._initialized = True
+            if not self._is_discovery_fresh():
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+            return
+        
         # Discover available models
         self._discover_all_models(gemini_api_key, ollama_base_url)
         
@@ -76,17 +119,43 @@ class ModelRegistry:
         
         self._initialized = True
     
-    def refresh_models(self, gemini_api_key: Optional[str] = None, ollama_base_url: str = "http://localhost:11434"):
-        """Re-discover models (called from TUI refresh option)."""
+    def refresh_models(self, gemini_api_key: Optional[str] = None, ollama_base_url: str = "http://localhost:11434", force: bool = False):
+        """
+        Re-discover models (called from TUI refresh option).
+        Skipped if the last discovery was under REFRESH_TTL ago, unless force=True.
+        """
+        if not force and self._is_discovery_fresh(REFRESH_TTL):
+            return
         self._discover_all_models(gemini_api_key, ollama_base_url)
         self._validate_and_set_defaults()
         self._save_config()
     
+    def _background_refresh(self):
+        """
+        Revalidate a stale cached model list without disturbing the session:
+        providers that returned nothing (e.g. Ollama briefly down) keep their
+        cached models, and user selections are never rewritten from here.
+        """
+        discovered = self._discover_models()
+        if not discovered:
+            return
+        answered = {m.provider for m in discovered}
+        kept = [m for m in self._available_models if m.provider not in answered]
+        self._set_available_models(discovered + kept)
+        self._config["last_discovery"] = datetime.now().isoformat()
+        self._save_config()
+    
     # --- Discovery ---
     
     def _discover_all_models(self, gemini_api_key: Optional[str], ollama_base_url: str):
-        """Discover models from all available providers."""
-        self._available_models = []
+        """Discover models from all available providers and replace the model list."""
+        # Swap in one step so readers never observe a half-built list
+        self._set_available_models(self._discover_models())
+        self._config["last_discovery"] = datetime.now().isoformat()
+    
+    def _discover_models(self) -> List[ModelInfo]:
+        """Query every provider; a failing provider contributes no models."""
+        discovered: List[ModelInfo] = []
         
         # Use Factory to get all configured providers
         # Note: We can pass keys here if needed, but Factory currently pulls from settings.
@@ -97,23 +166,37 @@ class ModelRegistry:
         for provider in providers:
             try:
                 models = provider.discover_models()
-                self._available_models.extend(models)
+                discovered.extend(models)
             except Exception as e:
                 print(f"⚠️ Error discovering models from {provider.provider_name}: {e}")
-        
-        self._config["last_discovery"] = datetime.now().isoformat()
+        return discovered
+    
+    def _set_available_models(self, models: List[ModelInfo]):
+        """Replace the model list and its derived lookups."""
+        self._available_models = models
+        self._models_by_urn = {m.urn: m for m in models}
+        self._llms = [m for m in models if m.type == "llm"]
+        self._embeddings = [m for m in models if m.type == "embedding"]
     
-        pass  # Legacy methods removed
+    def _is_discovery_fresh(self, ttl: timedelta = DISCOVERY_TTL) -> bool:
+        """Check whether the last discovery happened within the given TTL."""
+        last = self._config.get("last_discovery")
+        if not last:
+            return False
+        try:
+            return datetime.now() - datetime.fromisoformat(last) < ttl
+        except ValueError:
+            return False
     
     # --- Getters ---
     
     def get_available_llms(self) -> List[ModelInfo]:
         """Get all available LLM models."""
-        return [m for m in self._available_models if m.type == "llm"]
+        return self._llms.copy()
     
     def get_available_embeddings(self) -> List[ModelInfo]:
         """Get all available embedding models."""
-        return [m for m in self._available_models if m.type == "embedding"]
+        return self._embeddings.copy()
     
     def get_all_models(self) -> List[ModelInfo]:
         """Get all discovered models."""
@@ -134,18 +217,18 @@ class ModelRegistry:
         if slot not in (1, 2):
             raise ValueError("Slot must be 1 or 2")
         self._config[f"llm_slot_{slot}"] = urn
-        self._save_config()
+        self._schedule_save()
     
     def set_active_embedding(self, urn: str):
         """Set the active embedding model."""
         self._config["embedding"] = urn
-        self._save_config()
+        self._schedule_save()
     
     # --- Validation & Defaults ---
     
     def _validate_and_set_defaults(self):
         """Ensure selections are valid, set defaults if needed."""
-        available_urns = {m.urn for m in self._available_models}
+        available_urns = self._models_by_urn.keys()
         llms = self.get_available_llms()
         embeddings = self.get_available_embeddings()
         
@@ -153,7 +236,7 @@ class ModelRegistry:
         if not self._config.get("llm_slot_1") or self._config["llm_slot_1"] not in available_urns:
             if llms:
                 # Prefer Gemini Flash if available, else first LLM
-                flash = next((m for m in llms if "flash" in m.name.lower() and "lite" not in m.name.lower()), None)
+                flash = next((m for m in llms if m.tags & MODEL_TAG_FLASH and not m.tags & MODEL_TAG_LITE), None)
                 self._config["llm_slot_1"] = flash.urn if flash else llms[0].urn
             else:
                 self._config["llm_slot_1"] = None
@@ -187,25 +270,59 @@ class ModelRegistry:
         """Load config from JSON file."""
         if CONFIG_FILE.exists():
             try:
-                with open(CONFIG_FILE, 'r') as f:
-                    saved = json.load(f)
+                with open(CONFIG_FILE, 'rb') as f:
+                    saved = orjson.loads(f.read())
+                    cached_models = saved.pop("models", None) or []
                     self._config.update(saved)
+                    self._set_available_models([
+                        ModelInfo(**{k: v for k, v in m.items() if k in _PERSISTED_MODEL_FIELDS})
+                        for m in cached_models
+                    ])
             except Exception as e:
                 print(f"⚠️ Could not load model config: {e}")
     
     def _save_config(self):
-        """Save config to JSON file."""
-        try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self._config, f, indent=2)
-        except Exception as e:
-            print(f"⚠️ Could not save model config: {e}")
+        """Save config to JSON file (atomically, via a temp file + rename)."""
+        with self._write_lock:
+            try:
+                data = dict(self._config)
+                data["models"] = [
+                    {k: v for k, v in asdict(m).items() if k in _PERSISTED_MODEL_FIELDS}
+                    for m in self._available_models
+                ]
+                tmp_file = CONFIG_FILE.with_suffix('.tmp')
+                with open(tmp_file, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                os.replace(tmp_file, CONFIG_FILE)
+            except Exception as e:
+                print(f"⚠️ Could not save model config: {e}")
+    
+    def _schedule_save(self):
+        """Debounce config writes: (re)start a timer that saves once setters go quiet."""
+        with self._save_lock:
+            self._save_pending = True
+            if self._save_timer:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self._flush_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _flush_save(self):
+        """Write any pending config change now (also runs at interpreter exit)."""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._save_pending:
+                return
+            self._save_pending = False
+            self._save_config()
     
     # --- Utility ---
     
     def get_model_info(self, urn: str) -> Optional[ModelInfo]:
         """Get ModelInfo for a specific URN."""
-        return next((m for m in self._available_models if m.urn == urn), None)
+        return self._models_by_urn.get(urn)
     
     def has_provider(self, provider: str) -> bool:
         """Check if any models from a provider are available."""
@@ -0,0 +1,119 @@
+"""
+NumPy Index - In-memory exact search for small collections.
+
+For the small local corpora used here, holding every embedding in one
+contiguous matrix and scoring a query with matrix-vector products beats a
+Chroma HNSW query plus its per-call overhead.
+Collections larger than MAX_VECTORS are left to Chroma.
+
+Rows are stored int8-quantised with a per-row symmetric scale (4x smaller
+than float32); they are upcast block by block for scoring.
+
+Results are ranked by the collection's own distance ("hnsw:space": Chroma's
+default l2, cosine or ip), so they don't change when a collection grows past
+MAX_VECTORS and is handed to Chroma. Embeddings are not assumed normalised
+(Ollama's /api/embeddings output is not).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Above this many vectors, fall back to Chroma's ANN index
+MAX_VECTORS = 50_000
+# Rows upcast to float32 at a time while scoring (bounds the temporary buffer)
+SCORE_BLOCK_ROWS = 4096
+
+
+def _quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantisation: returns (int8 rows, float32 scales)."""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+@dataclass
+class _Snapshot:
+    """A loaded copy of a collection."""
+    count: int
+    matrix: np.ndarray              # (N, D) int8, quantised embeddings
+    scales: np.ndarray              # (N,) float32, row i ~= matrix[i] * scales[i]
+    norms: np.ndarray               # (N,) float32, L2 norm of each original row
+    space: str                      # Chroma distance: "l2", "cosine" or "ip"
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+
+
+class NumpyIndex:
+    """
+    Per-collection cache of embedding matrices.
+    
+    A snapshot is reloaded when the collection's count changes or after
+    invalidate() (called by writers, since upserts can keep the count).
+    """
+    
+    _snapshots: Dict[str, _Snapshot] = {}
+    
+    @classmethod
+    def invalidate(cls, collection_name: str):
+        """Drop the cached snapshot of a collection."""
+        cls._snapshots.pop(collection_name, None)
+    
+    @classmethod
+    def _get_snapshot(cls, collection) -> Optional[_Snapshot]:
+        count = collection.count()
+        if count == 0 or count > MAX_VECTORS:
+            return None
+
+        snapshot = cls._snapshots.get(collection.name)
+        if snapshot is None or snapshot.count != count:
+            data = collection.get(include=["embeddings", "documents", "metadatas"])
+            vectors = np.asarray(data["embeddings"], dtype=np.float32)
+            matrix, scales = _quantize_int8(vectors)
+            snapshot = _Snapshot(
+                count=len(matrix),
+                matrix=matrix,
+                scales=scales,
+                norms=np.linalg.norm(vectors, axis=1).astype(np.float32),
+                space=(collection.metadata or {}).get("hnsw:space", "l2"),
+                documents=data["documents"],
+                metadatas=data["metadatas"] or [{} for _ in range(len(matrix))]
+            )
+            cls._snapshots[collection.name] = snapshot
+        return snapshot
+    
+    @classmethod
+    def search(cls, collection, query_embedding: List[float], k: int) -> Optional[Tuple[List[str], List[Dict[str, Any]]]]:
+        """
+        Return the top-k (documents, metadatas) under the collection's distance, best first.
+        Returns None if the collection is empty or too large; use Chroma instead.
+        """
+        snapshot = cls._get_snapshot(collection)
+        if snapshot is None:
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        dots = np.empty(len(snapshot.matrix), dtype=np.float32)
+        for start in range(0, len(dots), SCORE_BLOCK_ROWS):
+            block = snapshot.matrix[start:start + SCORE_BLOCK_ROWS]
+            dots[start:start + len(block)] = block.astype(np.float32) @ query
+        dots *= snapshot.scales
+
+        # Higher score = closer, under the same metric Chroma would use
+        if snapshot.space == "cosine":
+            scores = dots / (np.maximum(snapshot.norms, 1e-12) * max(float(np.linalg.norm(query)), 1e-12))
+        elif snapshot.space == "ip":
+            scores = dots
+        else:
+            # -||v - q||^2 without the per-query constant ||q||^2
+            scores = 2 * dots - snapshot.norms ** 2
+
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [snapshot.documents[i] for i in top], [snapshot.metadatas[i] for i in top]
@@ -1,21 +1,21 @@
-from typing import Optional, Dict, Any, Tuple
+import asyncio
+import re
+from typing import List, Optional, Set, Union
 
-from app.models.schemas import PromptRequest, AIResponse
-from app.core.config import settings
+from app.models.schemas import PromptRequest, AIResponse, CoTStep
 from app.core.exceptions import AIModelError
 from app.services.ai_providers import AIServiceFactory, parse_model_urn
 from app.services.model_registry import ModelRegistry
+from app.services.semantic_cache import SemanticCache
 
 # --- Core Execution Helper ---
 
-# --- Core Execution Helper ---
-
-# helper parse method replaced by shared utility
-
-async def _execute_model_call(model_urn: str, request: PromptRequest) -> AIResponse:
+async def _execute_model_call(model_urn: str, request: PromptRequest, cacheable: bool = True) -> AIResponse:
     """
     Core helper function to execute a model call.
     model_urn: The standardized identifier string (e.g., 'gemini/gemini-1.5-flash')
+    cacheable: False when user_query embeds injected context (retrieved chunks,
+               prior analysis), which would make unrelated questions look alike to the semantic cache.
     """
     try:
         # 1. Parse the URN to find out WHO to call and WHAT model to ask for
@@ -24,8 +24,11 @@ async def _execute_model_call(model_urn: str, request: PromptRequest) -> AIRespo
         # 2. Get the provider instance
         provider = AIServiceFactory.get_service(provider_name)
         
-        # 3. Execute
-        return await provider.generate_content(request, target_model_name)
+        # 3. Execute (answered from the semantic cache when a near-duplicate was seen)
+        generate = lambda: provider.generate_content(request, target_model_name)
+        if not cacheable:
+            return await generate()
+        return await SemanticCache.cached_call(model_urn, request, generate)
 
     except AIModelError:
         raise
@@ -39,7 +42,8 @@ async def _run_analysis_step(request: PromptRequest, model_urn: str) -> AIRespon
     """
     Step 1: Analyze the problem without solving it.
     """
-    analysis_request = PromptRequest(
+    # Internal requests are built from already-validated fields: skip re-validation
+    analysis_request = PromptRequest.model_construct(
         user_query=f"Analyze this problem step by step and break it down into logical steps. Do not solve it yet, just analyze: {request.user_query}",
         system_role="You are an analytical sub-agent. Think step by step.",
         temperature=request.temperature
@@ -52,18 +56,76 @@ async def _run_analysis_step(request: PromptRequest, model_urn: str) -> AIRespon
          
     return response
 
+
+# --- Analysis Compression ---
+
+# Segment boundaries: blank lines, or a new line starting a numbered/bulleted step
+_SEGMENT_SPLIT_RE = re.compile(r"\n\s*\n|\n(?=\s*(?:\d+[.)]|[-*•]|step \d+))", re.IGNORECASE)
+# Explicit retraction of the previous segment, e.g. "Correction:", "Scratch that,",
+# "I made a mistake above." (the clause after a spoken marker is part of the marker)
+_CORRECTION_RE = re.compile(
+    r"^\W*(?:correction:|(?:oops|scratch that|i made an? (?:mistake|error)"
+    r"|(?:that|this)(?:'s| is| was) (?:wrong|incorrect)|ignore (?:that|the above))\b[^.,:;!\n]*[.,:;!]?)\s*",
+    re.IGNORECASE
+)
+# Leading "1." / "Step 2:" markers, ignored when comparing segments
+_STEP_PREFIX_RE = re.compile(r"^\W*(?:step\s*)?\d+[.):]?\s*")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = 3) -> Set[int]:
+    """Hashed word n-grams of a segment (ignoring step numbering/punctuation), for near-duplicate detection."""
+    words = _WORD_RE.findall(_STEP_PREFIX_RE.sub("", text.lower()))
+    if len(words) <= size:
+        return {hash(" ".join(words))}
+    return {hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def _compress_analysis(text: str, redundancy_threshold: float = 0.8) -> str:
+    """
+    Shrink an analysis before it is fed to the synthesis step (DLCoT-style):
+    split it into segments, drop the reasoning an explicit correction retracts
+    (keeping the correction itself, minus its marker), and drop segments whose
+    shingle overlap (Jaccard) with an already kept segment is >= redundancy_threshold.
+    """
+    kept: List[str] = []
+    kept_shingles: List[Set[int]] = []
+    previous_kept = False
+    for segment in _SEGMENT_SPLIT_RE.split(text):
+        segment = segment.strip()
+        if not segment:
+            continue
+        marker = _CORRECTION_RE.match(segment)
+        if marker:
+            if previous_kept:
+                kept.pop()
+                kept_shingles.pop()
+            segment = segment[marker.end():]
+            if not _WORD_RE.search(segment):
+                previous_kept = False
+                continue
+        shingles = _shingles(segment)
+        previous_kept = not any(
+            len(shingles & other) / len(shingles | other) >= redundancy_threshold for other in kept_shingles
+        )
+        if previous_kept:
+            kept.append(segment)
+            kept_shingles.append(shingles)
+    return "\n\n".join(kept) or text
+
+
 async def _run_synthesis_step(request: PromptRequest, analysis_content: str, model_urn: str) -> AIResponse:
     """
-    Step 2: Synthesize the final answer based on analysis.
+    Step 2: Synthesize the final answer based on (compressed) analysis.
     """
-    synthesis_query = f"Original Query: {request.user_query}\n\nAnalysis:\n{analysis_content}\n\nBased on the analysis, provide the final comprehensive answer."
-    main_agent_request = PromptRequest(
+    synthesis_query = f"Query: {request.user_query}\n\nAnalysis:\n{_compress_analysis(analysis_content)}\n\nFinal answer:"
+    main_agent_request = PromptRequest.model_construct(
         user_query=synthesis_query,
         system_role=request.system_role,
         temperature=request.temperature
     )
     
-    return await _execute_model_call(model_urn, main_agent_request)
+    return await _execute_model_call(model_urn, main_agent_request, cacheable=False)
 
 
 # --- Public API Functions ---
@@ -77,24 +139,72 @@ def _get_model_urn(slot: int) -> str:
     return urn
 
 
-async def call_model_1(request: PromptRequest) -> AIResponse:
+async def call_model_1(request: PromptRequest, cacheable: bool = True) -> AIResponse:
     """Call Configured Model 1"""
-    return await _execute_model_call(_get_model_urn(1), request)
+    return await _execute_model_call(_get_model_urn(1), request, cacheable)
 
 
-async def call_model_2(request: PromptRequest) -> AIResponse:
+async def call_model_2(request: PromptRequest, cacheable: bool = True) -> AIResponse:
     """Call Configured Model 2"""
-    return await _execute_model_call(_get_model_urn(2), request)
+    return await _execute_model_call(_get_model_urn(2), request, cacheable)
 
 
-async def call_specific_model_by_slot(slot: int, request: PromptRequest) -> AIResponse:
+# Slot number -> entry point, looked up instead of branching per call
+_SLOT_CALLS = {1: call_model_1, 2: call_model_2}
+
+
+async def call_specific_model_by_slot(slot: int, request: PromptRequest, cacheable: bool = True) -> AIResponse:
     """Call a specific model slot (1 or 2)"""
-    if slot == 1:
-        return await call_model_1(request)
-    elif slot == 2:
-        return await call_model_2(request)
-    else:
+    call = _SLOT_CALLS.get(slot)
+    if call is None:
         raise ValueError("Invalid model slot. Use 1 or 2.")
+    return await call(request, cacheable)
+
+
+async def warmup_slot(slot: int, preload: bool = False) -> None:
+    """
+    Resolve a slot's provider and build its client so the first call doesn't pay for it.
+    With preload=True the model itself is also made ready (e.g. loaded by Ollama).
+    """
+    provider_name, model_name = parse_model_urn(_get_model_urn(slot))
+    provider = AIServiceFactory.get_service(provider_name)
+    await asyncio.to_thread(provider.warmup)
+    if preload:
+        await provider.preload_model(model_name)
+
+
+async def generate_batch(
+    requests: List[PromptRequest],
+    slot: int = 1,
+    max_concurrency: int = 5,
+    requests_per_minute: Optional[int] = None,
+    return_exceptions: bool = False
+) -> List[Union[AIResponse, BaseException]]:
+    """
+    Run several independent prompts against a slot concurrently (at most max_concurrency in flight).
+    requests_per_minute spaces out call starts to stay under a provider rate limit;
+    with return_exceptions=True a failed prompt yields its exception instead of aborting the batch.
+    """
+    model_urn = _get_model_urn(slot)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    interval = 60 / requests_per_minute if requests_per_minute else 0.0
+    pacing_lock = asyncio.Lock()
+    next_start = 0.0
+
+    async def run_one(request: PromptRequest) -> AIResponse:
+        nonlocal next_start
+        async with semaphore:
+            if interval:
+                # Reserve the next start slot, then wait for it outside the lock
+                async with pacing_lock:
+                    now = asyncio.get_running_loop().time()
+                    delay = next_start - now
+                    next_start = max(now, next_start) + interval
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            return await _execute_model_call(model_urn, request)
+
+    return await asyncio.gather(*(run_one(r) for r in requests), return_exceptions=return_exceptions)
 
 
 async def generate_zero_shot_response(request: PromptRequest) -> AIResponse:
@@ -126,14 +236,14 @@ async def generate_chain_of_thought_response(request: PromptRequest) -> AIRespon
         final_response = await _run_synthesis_step(request, analysis_response.content, synthesis_urn)
 
         # Construct final combined response
-        return AIResponse(
+        return AIResponse.model_construct(
             content=final_response.content,
             tokens_used=analysis_response.tokens_used + final_response.tokens_used,
             model_name=f"chain-of-thought",
-            steps=[
-                {"title": f"Analysis ({analysis_urn})", "content": analysis_response.content, "style": "cyan"},
-                {"title": f"Final Answer ({synthesis_urn})", "content": final_response.content, "style": "green"}
-            ]
+            steps=(
+                CoTStep(f"Analysis ({analysis_urn})", analysis_response.content, "cyan"),
+                CoTStep(f"Final Answer ({synthesis_urn})", final_response.content, "green")
+            )
         )
     except AIModelError:
             raise
@@ -7,19 +7,36 @@ This engine provides document Q&A with:
 - Citation-aware responses with source attribution
 """
 
+import io
 import os
-import uuid
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from pathlib import Path
 
 import chromadb
+import orjson
 from PyPDF2 import PdfReader
 
+try:
+    import fitz  # PyMuPDF: C-level content stream parsing, much faster than PyPDF2
+except ImportError:
+    fitz = None
+
 from app.core.config import settings
 from app.services.ai_providers import AIServiceFactory, parse_model_urn
 from app.services.model_registry import ModelRegistry
+from app.services.numpy_index import NumpyIndex
 from app.models.schemas import PromptRequest
 from app.utils.text_splitter import RecursiveCharacterTextSplitter
+from app.utils.ingested_index import get_ingested_files, set_ingested_files, add_ingested_files
 from app.services import prompt_engine
 
 
@@ -55,6 +72,158 @@ QA_COLLECTION_NAME = "qa_collection"
 QA_DOCUMENTS_DIR = "./data/qa_documents"
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
+# Extracted page texts, keyed by PDF path/mtime/size
+PDF_TEXT_CACHE_DIR = Path("./data/.cache/pdf_text")
+# Max length of a citation excerpt
+EXCERPT_WIDTH = 80
+_WHITESPACE_TO_SPACE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+# PDFs up to this size are read into memory in one go before parsing
+MAX_IN_MEMORY_PDF_BYTES = 200 * 1024 * 1024
+# Minimum pages per worker process before PDF extraction is parallelized
+PAGES_PER_WORKER = 16
+# Maximum number of texts sent to the embedding provider in one call
+EMBED_BATCH_SIZE = 256
+# Number of PDFs parsed concurrently during ingestion
+PARSE_CONCURRENCY = 4
+
+
+# --- PDF Text Extraction ---
+
+def _load_pdf(file_path: str, in_memory: bool = True):
+    """
+    Open a PDF with PyMuPDF if installed, else PyPDF2.
+    With in_memory, files below MAX_IN_MEMORY_PDF_BYTES are read in a single
+    call and parsed from memory, avoiding many small reads/seeks against the file.
+    """
+    data = None
+    if in_memory and os.path.getsize(file_path) < MAX_IN_MEMORY_PDF_BYTES:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    
+    if fitz is not None:
+        return fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(file_path)
+    return PdfReader(io.BytesIO(data) if data is not None else file_path)
+
+
+def _page_count(pdf) -> int:
+    return len(pdf) if fitz is not None else len(pdf.pages)
+
+
+def _page_texts(pdf, start: int, stop: int) -> List[str]:
+    if fitz is not None:
+        return [pdf[i].get_text("text") for i in range(start, stop)]
+    return [pdf.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _close_pdf(pdf):
+    if fitz is not None:
+        pdf.close()
+
+
+def _extract_page_range(args: Tuple[str, int, int]) -> List[str]:
+    """
+    Process pool worker: extract pages [start, stop) of a PDF.
+    Opened by path so each worker doesn't hold its own copy of the whole file.
+    """
+    file_path, start, stop = args
+    pdf = _load_pdf(file_path, in_memory=False)
+    try:
+        return _page_texts(pdf, start, stop)
+    finally:
+        _close_pdf(pdf)
+
+
+def _cached_page_texts(file_path: str) -> List[str]:
+    """
+    Extract the text of every page, memoized on disk keyed by the file's
+    path, mtime and size so re-ingesting an unchanged PDF skips extraction.
+    """
+    stat = os.stat(file_path)
+    key = hashlib.blake2b(
+        f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}".encode(), digest_size=16
+    ).hexdigest()
+    cache_file = PDF_TEXT_CACHE_DIR / f"{key}.json"
+    
+    try:
+        with open(cache_file, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable PDF text cache {cache_file}: {e}")
+    
+    texts = _extract_page_texts(file_path)
+    try:
+        PDF_TEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(texts))
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"⚠️ Could not write PDF text cache: {e}")
+    return texts
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared PDF extraction pool, created on first use and capped at cpu_count
+    however many files are parsed concurrently. Workers are started with
+    forkserver/spawn, not fork: this process is multi-threaded (httpx, chromadb,
+    logging) and a forked child could inherit a lock held by another thread.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context(method)
+            )
+        return _process_pool
+
+
+def _reset_process_pool(broken: ProcessPoolExecutor):
+    """Drop a broken pool (e.g. a worker crashed) so the next extraction starts a fresh one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is broken:
+            _process_pool = None
+
+
+def _extract_page_texts(file_path: str) -> List[str]:
+    """
+    Extract the text of every page.
+    Large documents are split into page ranges extracted in parallel worker
+    processes, since text extraction is CPU-bound.
+    """
+    pdf = _load_pdf(file_path)
+    try:
+        page_count = _page_count(pdf)
+        workers = min(os.cpu_count() or 1, page_count // PAGES_PER_WORKER)
+        if workers < 2:
+            return _page_texts(pdf, 0, page_count)
+    finally:
+        _close_pdf(pdf)
+    
+    step = -(-page_count // workers)
+    ranges = [(file_path, i, min(i + step, page_count)) for i in range(0, page_count, step)]
+    pool = _get_process_pool()
+    try:
+        return [text for texts in pool.map(_extract_page_range, ranges) for text in texts]
+    except BrokenProcessPool:
+        _reset_process_pool(pool)
+        raise
+
+
+def _chunk_id(chunk: PdfChunk) -> str:
+    """Deterministic id (same file/page/chunk/text -> same id), so re-ingesting upserts in place."""
+    meta = chunk.metadata
+    key = f"{meta['original_name']}:{meta['page_number']}:{meta['chunk_number']}:{chunk.text}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
 
 # --- Q&A Engine ---
@@ -76,21 +245,24 @@ class QAEngine:
             cls._client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
         return cls._client
     
+    @classmethod
+    @functools.lru_cache(maxsize=4)
+    def _get_collection_by_name(cls, collection_name: str):
+        """Get or create a collection once and reuse the handle."""
+        return cls.get_client().get_or_create_collection(name=collection_name)
+    
     @classmethod
     def get_collection(cls):
         """Get the Q&A collection (separate from Basic RAG)."""
-        client = cls.get_client()
-        
         registry = ModelRegistry.instance()
         urn = registry.get_active_embedding()
         if not urn:
             # Fallback or error?
-            return client.get_or_create_collection(name=f"{QA_COLLECTION_NAME}_default")
+            return cls._get_collection_by_name(f"{QA_COLLECTION_NAME}_default")
 
         provider_name, _ = parse_model_urn(urn)
         # Include provider name to avoid embedding dimension conflicts
-        collection_name = f"{QA_COLLECTION_NAME}_{provider_name}"
-        return client.get_or_create_collection(name=collection_name)
+        return cls._get_collection_by_name(f"{QA_COLLECTION_NAME}_{provider_name}")
     
     @classmethod
     def get_source_dir(cls) -> str:
@@ -106,9 +278,12 @@ class QAEngine:
         Returns: [{"name": "file.pdf", "status": "INGESTED" | "NEW"}]
         """
         source_dir = cls.get_source_dir()
-        disk_files = set(os.listdir(source_dir))
-        # Filter to PDF files only, exclude hidden files
-        disk_files = {f for f in disk_files if f.endswith('.pdf') and not f.startswith('.')}
+        # PDF files only, excluding hidden files (name checks first; is_file() reuses scandir's d_type)
+        with os.scandir(source_dir) as entries:
+            disk_files = {
+                e.name for e in entries
+                if e.name.endswith('.pdf') and not e.name.startswith('.') and e.is_file()
+            }
         
         ingested_files = set(cls.list_ingested_files())
         
@@ -123,16 +298,21 @@ class QAEngine:
     def list_ingested_files(cls) -> List[str]:
         """Return list of unique filenames in the collection."""
         collection = cls.get_collection()
-        result = collection.get(include=["metadatas"])
         
-        if not result['metadatas']:
-            return []
+        # Served from the sidecar index, kept up to date by ingest_files
+        indexed = get_ingested_files(collection.name)
+        if indexed is not None:
+            return indexed
+        
+        # No index entry yet: scan chunk metadata once and backfill
+        result = collection.get(include=["metadatas"])
         
         filenames = set()
-        for meta in result['metadatas']:
+        for meta in result['metadatas'] or []:
             if meta and "original_name" in meta:
                 filenames.add(meta["original_name"])
         
+        set_ingested_files(collection.name, filenames)
         return sorted(list(filenames))
     
     @classmethod
@@ -148,11 +328,9 @@ class QAEngine:
         )
         
         try:
-            reader = PdfReader(file_path)
             file_name = os.path.basename(file_path)
             
-            for page_num, page in enumerate(reader.pages, 1):
-                text = page.extract_text()
+            for page_num, text in enumerate(_cached_page_texts(file_path), 1):
                 if text and text.strip():
                     page_chunks = splitter.split_text(text.strip())
                     
@@ -173,9 +351,50 @@ class QAEngine:
         return chunks
     
     @classmethod
-    def ingest_files(cls, filenames: List[str]) -> Dict[str, str]:
+    def _embed_and_upsert(cls, service, model_name: str, collection, parsed: Dict[str, List[PdfChunk]]) -> Dict[str, str]:
+        """
+        Embed and upsert the chunks of several parsed files in mini-batches of
+        EMBED_BATCH_SIZE, so only one batch of embeddings is held at a time.
+        Returns: {filename: "Success (...)" | "Failed: reason"}
+        """
+        total = sum(len(chunks) for chunks in parsed.values())
+        print(f"Generating embeddings for {total} chunks from {len(parsed)} files using {model_name}...")
+        
+        failures: Dict[str, str] = {}
+        stream = ((filename, c) for filename, chunks in parsed.items() for c in chunks)
+        while batch := list(islice(stream, EMBED_BATCH_SIZE)):
+            try:
+                # Only embed chunks not already stored (ids are content hashes)
+                ids = [_chunk_id(c) for _, c in batch]
+                existing = set(collection.get(ids=ids, include=[])["ids"])
+                novel = [(chunk_id, c) for chunk_id, (_, c) in zip(ids, batch) if chunk_id not in existing]
+                if not novel:
+                    continue
+                
+                texts = [c.text for _, c in novel]
+                collection.upsert(
+                    ids=[chunk_id for chunk_id, _ in novel],
+                    documents=texts,
+                    embeddings=service.embed_batch(texts, model_name),
+                    metadatas=[c.metadata for _, c in novel]
+                )
+            except Exception as e:
+                for filename, _ in batch:
+                    failures.setdefault(filename, f"Failed: {str(e)}")
+        
+        NumpyIndex.invalidate(collection.name)
+        return {
+            filename: failures.get(filename, f"Success ({len(chunks)} chunks)")
+            for filename, chunks in parsed.items()
+        }
+    
+    @classmethod
+    async def ingest_files(cls, filenames: List[str], max_concurrency: int = PARSE_CONCURRENCY) -> Dict[str, str]:
         """
         Ingest specified PDF files from source directory.
+        Runs as a producer/consumer pipeline: files are parsed in worker threads
+        (at most max_concurrency at a time) while already-parsed chunks are
+        being embedded and upserted, so parsing overlaps embedding latency.
         Returns: {filename: "Success" | "Failed: reason"}
         """
         registry = ModelRegistry.instance()
@@ -188,41 +407,47 @@ class QAEngine:
         
         collection = cls.get_collection()
         results = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-        for filename in filenames:
+        async def parse_one(filename: str):
             file_path = os.path.join(QA_DOCUMENTS_DIR, filename)
-            
-            try:
-                chunks = cls.parse_pdf(file_path)
-                
-                if not chunks:
-                    results[filename] = "Empty file or parse error"
-                    continue
-                
-                # Generate embeddings
-                texts = [c.text for c in chunks]
-                print(f"Generating embeddings for {len(texts)} chunks from {filename} using {model_name}...")
-                embeddings = service.embed_batch(texts, model_name)
-                
-                # Prepare data
-                ids = [str(uuid.uuid4()) for _ in chunks]
-                documents = texts
-                metadatas = [c.metadata for c in chunks]
-                
-                # Upsert to collection
-                collection.upsert(
-                    ids=ids,
-                    documents=documents,
-                    embeddings=embeddings,
-                    metadatas=metadatas
-                )
-                
-                results[filename] = f"Success ({len(chunks)} chunks)"
-                
-            except Exception as e:
-                results[filename] = f"Failed: {str(e)}"
+            async with semaphore:
+                try:
+                    chunks = await asyncio.to_thread(cls.parse_pdf, file_path)
+                except Exception as e:
+                    results[filename] = f"Failed: {str(e)}"
+                    return
+            if chunks:
+                await queue.put((filename, chunks))
+            else:
+                results[filename] = "Empty file or parse error"
+        
+        async def producer():
+            await asyncio.gather(*(parse_one(f) for f in filenames))
+            await queue.put(None)
+        
+        async def consumer():
+            # Accumulate parsed files until there is a full embedding batch, then flush
+            pending: Dict[str, List[PdfChunk]] = {}
+            pending_count = 0
+            while True:
+                item = await queue.get()
+                if item is not None:
+                    filename, chunks = item
+                    pending[filename] = chunks
+                    pending_count += len(chunks)
+                if pending and (item is None or pending_count >= EMBED_BATCH_SIZE):
+                    results.update(await asyncio.to_thread(
+                        cls._embed_and_upsert, service, model_name, collection, pending
+                    ))
+                    pending, pending_count = {}, 0
+                if item is None:
+                    break
         
-        return results
+        await asyncio.gather(producer(), consumer())
+        add_ingested_files(collection.name, [f for f, r in results.items() if r.startswith("Success")])
+        return {f: results[f] for f in filenames}
     
     @classmethod
     def similarity_search_with_metadata(cls, query: str, k: int = 3) -> List[Dict[str, Any]]:
@@ -241,21 +466,28 @@ class QAEngine:
         
         query_embedding = service.embed_text(query, model_name)
         
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=k,
-            include=["documents", "metadatas"]
-        )
-        
-        if not results['documents'] or not results['documents'][0]:
-            return []
+        # Small collections are searched exactly in memory; large ones via Chroma's index
+        local = NumpyIndex.search(collection, query_embedding, k)
+        if local is not None:
+            documents, metadatas = local
+        else:
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=k,
+                include=["documents", "metadatas"]
+            )
+            
+            if not results['documents'] or not results['documents'][0]:
+                return []
+            
+            documents = results['documents'][0]
+            metadatas = results['metadatas'][0] if results['metadatas'] else [{}] * len(documents)
         
         docs = []
-        for i, doc in enumerate(results['documents'][0]):
-            meta = results['metadatas'][0][i] if results['metadatas'] else {}
+        for doc, meta in zip(documents, metadatas):
             docs.append({
                 "content": doc,
-                "metadata": meta
+                "metadata": meta or {}
             })
         
         return docs
@@ -265,8 +497,8 @@ class QAEngine:
         """
         Ask a question and get an answer with citations.
         """
-        # 1. Retrieve relevant documents
-        docs = cls.similarity_search_with_metadata(question, k=k)
+        # 1. Retrieve relevant documents (off the event loop)
+        docs = await asyncio.to_thread(cls.similarity_search_with_metadata, question, k)
         
         if not docs:
             return QAResponse(
@@ -287,9 +519,7 @@ class QAEngine:
             context_parts.append(f"[{i}] Source: {source}, Page {page}\n{content}")
             
             # Build excerpt for citation
-            excerpt = content[:80].replace("\n", " ").strip()
-            if len(content) > 80:
-                excerpt += "..."
+            excerpt = content[:EXCERPT_WIDTH].translate(_WHITESPACE_TO_SPACE).strip() + ("..." if len(content) > EXCERPT_WIDTH else "")
             
             citations.append(Citation(
                 index=i,
@@ -313,13 +543,13 @@ Question: {question}
 Answer (with citations):"""
         
         # 4. Call LLM
-        request = PromptRequest(
+        request = PromptRequest.model_construct(
             user_query=qa_prompt,
             system_role="You are a Q&A assistant. Answer based on the provided context and cite your sources.",
             temperature=0.3
         )
         
-        response = await prompt_engine.call_specific_model_by_slot(model_slot, request)
+        response = await prompt_engine.call_specific_model_by_slot(model_slot, request, cacheable=False)
         
         # 5. Build response
         return QAResponse(
@@ -331,11 +561,10 @@ Answer (with citations):"""
     @classmethod
     def format_response_with_sources(cls, qa_response: QAResponse) -> str:
         """Format QA response with source legend."""
-        output = qa_response.answer
-        
+        parts = [qa_response.answer]
+
         if qa_response.citations:
-            output += "\n\n---\n**Sources:**\n"
-            for c in qa_response.citations:
-                output += f"\n[{c.index}] {c.source}, Page {c.page}\n    \"{c.excerpt}\"\n"
-        
-        return output
+            parts.append("\n\n---\n**Sources:**\n")
+            parts.extend(f"\n[{c.index}] {c.source}, Page {c.page}\n    \"{c.excerpt}\"\n" for c in qa_response.citations)
+
+        return "".join(parts)
@@ -18,9 +18,9 @@ class RAGEngine:
         if not os.path.exists(source_dir):
             os.makedirs(source_dir)
             
-        disk_files = set(os.listdir(source_dir))
-        # Filter hidden files
-        disk_files = {f for f in disk_files if not f.startswith(".")}
+        # Regular files only, excluding hidden files (is_file() reuses scandir's d_type)
+        with os.scandir(source_dir) as entries:
+            disk_files = {e.name for e in entries if not e.name.startswith(".") and e.is_file()}
         
         ingested_files = set(VectorStore.list_ingested_files())
         
@@ -39,6 +39,11 @@ class RAGEngine:
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
         results = {}
         
+        # Split every file first, then embed all chunks in one add_documents call
+        all_chunks: List[str] = []
+        all_sources: List[str] = []
+        batched_files: List[str] = []
+        
         for filename in filenames:
             file_path = os.path.join(settings.SOURCE_DOCUMENTS_DIR, filename)
             try:
@@ -47,8 +52,9 @@ class RAGEngine:
                 
                 chunks = splitter.split_text(text)
                 if chunks:
-                    VectorStore.add_documents(chunks, [filename] * len(chunks))
-                    results[filename] = "Success"
+                    all_chunks.extend(chunks)
+                    all_sources.extend([filename] * len(chunks))
+                    batched_files.append(filename)
                 else:
                     results[filename] = "Empty file or split error"
                     
@@ -57,8 +63,17 @@ class RAGEngine:
                 # TODO: Implement PDF/Docx loader here later
             except Exception as e:
                 results[filename] = f"Failed: {str(e)}"
+        
+        if all_chunks:
+            try:
+                VectorStore.add_documents(all_chunks, all_sources)
+                status = "Success"
+            except Exception as e:
+                status = f"Failed: {str(e)}"
+            for filename in batched_files:
+                results[filename] = status
                 
-        return results
+        return {f: results[f] for f in filenames}
 
     @staticmethod
     async def generate_rag_response(user_query: str, model_slot: int = 1, history: List[Dict[str, str]] = None) -> AIResponse:
@@ -107,4 +122,4 @@ Answer:
             history=history
         )
         
-        return await prompt_engine.call_specific_model_by_slot(model_slot, request)
+        return await prompt_engine.call_specific_model_by_slot(model_slot, request, cacheable=False)
@@ -0,0 +1,148 @@
+"""
+Semantic Cache - Skip LLM calls for (near-)duplicate prompts.
+
+Stores each answered prompt's embedding in a dedicated ChromaDB collection.
+A new prompt whose embedding lies within SEMANTIC_CACHE_MAX_DISTANCE (cosine)
+of a cached one, for the same model, system role and temperature, is answered
+from the cache without calling the provider.
+"""
+
+import asyncio
+import hashlib
+import functools
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.models.schemas import PromptRequest, AIResponse
+from app.services.ai_providers import AIServiceFactory, parse_model_urn
+from app.services.model_registry import ModelRegistry
+
+
+CACHE_COLLECTION_NAME = "llm_cache"
+
+# Short prompts embed close together even when they ask different things
+# ("2+2?" vs "2+3?"), so below this many words the distance limit is tightened
+SHORT_PROMPT_WORDS = 16
+SHORT_PROMPT_DISTANCE_FACTOR = 0.25
+
+
+def _max_distance(text: str) -> float:
+    """Cosine distance limit for a cache hit, stricter for short prompts."""
+    if len(text.split()) < SHORT_PROMPT_WORDS:
+        return settings.SEMANTIC_CACHE_MAX_DISTANCE * SHORT_PROMPT_DISTANCE_FACTOR
+    return settings.SEMANTIC_CACHE_MAX_DISTANCE
+
+
+class SemanticCache:
+    """
+    Embedding-keyed response cache in front of model calls.
+    
+    Cache failures never fail the underlying call; they only cost a miss.
+    """
+    
+    @classmethod
+    def get_collection(cls):
+        """Get the cache collection for the active embedding provider (None if unset)."""
+        urn = ModelRegistry.instance().get_active_embedding()
+        if not urn:
+            return None
+        provider_name, _ = parse_model_urn(urn)
+        return cls._get_collection_for_provider(provider_name)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _get_collection_for_provider(provider_name: str):
+        from app.services.vector_store import VectorStore
+        
+        # Include provider name to avoid embedding dimension conflicts
+        return VectorStore.get_client().get_or_create_collection(
+            name=f"{CACHE_COLLECTION_NAME}_{provider_name}",
+            metadata={"hnsw:space": "cosine"}
+        )
+    
+    @staticmethod
+    def _embed(text: str) -> List[float]:
+        provider_name, model_name = parse_model_urn(ModelRegistry.instance().get_active_embedding())
+        return AIServiceFactory.get_service(provider_name).embed_text(text, model_name)
+    
+    @staticmethod
+    def _filters(model_urn: str, request: PromptRequest) -> dict:
+        system_hash = hashlib.blake2b(request.system_role.encode(), digest_size=16).hexdigest()
+        return {
+            "model_urn": model_urn,
+            "system_hash": system_hash,
+            "temperature": float(request.temperature)
+        }
+    
+    @classmethod
+    def _lookup(cls, model_urn: str, request: PromptRequest, embedding: List[float], collection) -> Optional[AIResponse]:
+        filters = cls._filters(model_urn, request)
+        min_created_at = time.time() - settings.SEMANTIC_CACHE_TTL_SECONDS
+        where = {"$and": [{k: v} for k, v in filters.items()] + [{"created_at": {"$gte": min_created_at}}]}
+        
+        results = collection.query(
+            query_embeddings=[embedding],
+            n_results=1,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        if not results["ids"] or not results["ids"][0]:
+            return None
+        if results["distances"][0][0] > _max_distance(request.user_query):
+            return None
+        
+        meta = results["metadatas"][0][0]
+        return AIResponse(
+            content=results["documents"][0][0],
+            tokens_used=0,  # Served from cache, no tokens spent
+            model_name=meta["model_name"]
+        )
+    
+    @classmethod
+    def _store(cls, model_urn: str, request: PromptRequest, embedding: List[float], response: AIResponse, collection):
+        metadata = cls._filters(model_urn, request)
+        metadata.update(model_name=response.model_name, created_at=time.time())
+        collection.add(
+            ids=[str(uuid.uuid4())],
+            embeddings=[embedding],
+            documents=[response.content],
+            metadatas=[metadata]
+        )
+    
+    @classmethod
+    async def cached_call(
+        cls,
+        model_urn: str,
+        request: PromptRequest,
+        generate: Callable[[], Awaitable[AIResponse]]
+    ) -> AIResponse:
+        """
+        Return a cached response for this request if one is close enough,
+        otherwise await generate() and cache its result.
+        Requests with conversation history are not cached (the answer depends on it);
+        callers that inject context into user_query bypass this entirely (cacheable=False).
+        """
+        if not settings.SEMANTIC_CACHE_ENABLED or request.history:
+            return await generate()
+        
+        try:
+            collection = cls.get_collection()
+            if collection is None:
+                return await generate()
+            embedding = await asyncio.to_thread(cls._embed, request.user_query)
+            cached = await asyncio.to_thread(cls._lookup, model_urn, request, embedding, collection)
+        except Exception as e:
+            print(f"⚠️ Semantic cache lookup failed: {e}")
+            return await generate()
+        
+        if cached:
+            return cached
+        
+        response = await generate()
+        try:
+            await asyncio.to_thread(cls._store, model_urn, request, embedding, response, collection)
+        except Exception as e:
+            print(f"⚠️ Semantic cache store failed: {e}")
+        return response
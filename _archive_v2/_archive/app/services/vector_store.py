@@ -1,9 +1,38 @@
 import chromadb
-import uuid
+import hashlib
+import functools
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
 from app.services.model_registry import ModelRegistry
 from app.services.ai_providers import AIServiceFactory, parse_model_urn
+from app.services.numpy_index import NumpyIndex
+from app.utils.ingested_index import get_ingested_files, set_ingested_files, add_ingested_files
+
+# Maximum number of texts sent to the embedding provider in one call
+EMBED_BATCH_SIZE = 256
+
+
+@functools.lru_cache(maxsize=4)
+def _provider_and_collection(provider_name: str):
+    """Resolve (embedding service, Chroma collection) for a provider once and reuse them."""
+    service = AIServiceFactory.get_service(provider_name)
+    collection = VectorStore.get_client().get_or_create_collection(name=f"docs_{provider_name}")
+    return service, collection
+
+
+def _chunk_ids(texts: List[str], filenames: List[str]) -> List[str]:
+    """
+    Deterministic ids from (filename, chunk number within file, text),
+    so re-ingesting a file upserts in place instead of duplicating it.
+    """
+    counters: Dict[str, int] = {}
+    ids = []
+    for text, filename in zip(texts, filenames):
+        chunk_number = counters[filename] = counters.get(filename, 0) + 1
+        key = f"{filename}:{chunk_number}:{text}"
+        ids.append(hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+    return ids
+
 
 class VectorStore:
     _client = None
@@ -21,16 +50,14 @@ class VectorStore:
         Dynamically retrieve the collection for the ACTIVE provider.
         Collection Name: docs_{provider_name} (e.g., docs_google, docs_huggingface)
         """
-        client = cls.get_client()
         registry = ModelRegistry.instance()
         urn = registry.get_active_embedding()
         if not urn:
             raise ValueError("No embedding model configured. Please set one in Model Settings.")
         
         provider_name, _ = parse_model_urn(urn)
-        collection_name = f"docs_{provider_name}"
-        
-        return client.get_or_create_collection(name=collection_name)
+        _, collection = _provider_and_collection(provider_name)
+        return collection
 
     @classmethod
     def add_documents(cls, texts: List[str], filenames: List[str]):
@@ -47,24 +74,28 @@ class VectorStore:
              return
 
         provider_name, model_name = parse_model_urn(urn)
-        service = AIServiceFactory.get_service(provider_name)
-        collection = cls.get_collection()
+        service, collection = _provider_and_collection(provider_name)
 
-        # Generate Embeddings
+        # Embed and upsert in mini-batches so only one batch of embeddings is held at a time
         print(f"Generating embeddings for {len(texts)} chunks using {provider_name} ({model_name})...")
-        embeddings = service.embed_batch(texts, model_name)
-
-        # Prepare Data
-        ids = [str(uuid.uuid4()) for _ in range(len(texts))]
-        metadatas = [{"filename": fn} for fn in filenames]
-
-        # Upsert to Chroma
-        collection.upsert(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        ids = _chunk_ids(texts, filenames)
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch_ids = ids[i:i + EMBED_BATCH_SIZE]
+            # Only embed chunks not already stored (ids are content hashes)
+            existing = set(collection.get(ids=batch_ids, include=[])["ids"])
+            novel = [j for j in range(i, min(i + EMBED_BATCH_SIZE, len(texts))) if ids[j] not in existing]
+            if not novel:
+                continue
+            
+            batch_texts = [texts[j] for j in novel]
+            collection.upsert(
+                documents=batch_texts,
+                embeddings=service.embed_batch(batch_texts, model_name),
+                metadatas=[{"filename": filenames[j]} for j in novel],
+                ids=[ids[j] for j in novel]
+            )
+        NumpyIndex.invalidate(collection.name)
+        add_ingested_files(collection.name, set(filenames))
         print(f"Successfully added {len(texts)} chunks to {collection.name}.")
 
     @classmethod
@@ -78,11 +109,16 @@ class VectorStore:
              return []
 
         provider_name, model_name = parse_model_urn(urn)
-        service = AIServiceFactory.get_service(provider_name)
-        collection = cls.get_collection()
+        service, collection = _provider_and_collection(provider_name)
 
         query_embedding = service.embed_text(query, model_name)
 
+        # Small collections are searched exactly in memory; large ones via Chroma's index
+        local = NumpyIndex.search(collection, query_embedding, k)
+        if local is not None:
+            documents, _ = local
+            return documents
+
         results = collection.query(
             query_embeddings=[query_embedding],
             n_results=k
@@ -100,17 +136,19 @@ class VectorStore:
         """
         collection = cls.get_collection()
         
-        # Get all metadata (limit to a reasonable number, or fetch strictly what's needed)
+        # Served from the sidecar index, kept up to date by add_documents
+        indexed = get_ingested_files(collection.name)
+        if indexed is not None:
+            return indexed
+        
+        # No index entry yet (data ingested before the index existed): scan once and backfill.
         # Chroma doesn't support "distinct" query easily, so we fetch metadatas.
-        # Warning: For massive datasets, this is inefficient. OK for local RAG.
         result = collection.get(include=["metadatas"])
         
-        if not result['metadatas']:
-            return []
-            
         filenames = set()
-        for meta in result['metadatas']:
+        for meta in result['metadatas'] or []:
             if meta and "filename" in meta:
                 filenames.add(meta["filename"])
-                
+        
+        set_ingested_files(collection.name, filenames)
         return sorted(list(filenames))
@@ -0,0 +1,64 @@
+"""
+Ingested Files Index - Sidecar record of which files each collection holds.
+
+Listing ingested files by scanning every chunk's metadata in ChromaDB is
+O(total chunks); this small JSON index ({collection_name: [filenames]}) is
+updated on ingestion and read instead.
+"""
+
+import os
+import functools
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import orjson
+
+
+INDEX_FILE = Path("./data/ingested_files.json")
+
+
+@functools.lru_cache(maxsize=1)
+def _load_index(mtime_ns: int) -> Dict[str, List[str]]:
+    """Parse the index file; cached until the file's mtime changes."""
+    with open(INDEX_FILE, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _read_index() -> Dict[str, List[str]]:
+    try:
+        return _load_index(INDEX_FILE.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Could not read ingested files index: {e}")
+        return {}
+
+
+def get_ingested_files(collection_name: str) -> Optional[List[str]]:
+    """Sorted filenames recorded for a collection, or None if it has no entry yet."""
+    files = _read_index().get(collection_name)
+    return list(files) if files is not None else None
+
+
+def set_ingested_files(collection_name: str, filenames: Iterable[str]):
+    """Record the full set of filenames for a collection."""
+    index = dict(_read_index())
+    index[collection_name] = sorted(set(filenames))
+    try:
+        INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = INDEX_FILE.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(index, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, INDEX_FILE)
+    except Exception as e:
+        print(f"⚠️ Could not save ingested files index: {e}")
+
+
+def add_ingested_files(collection_name: str, filenames: Iterable[str]):
+    """
+    Add filenames to a collection's entry. Collections without an entry are left
+    alone: their first listing scans the collection, which includes these files.
+    """
+    existing = get_ingested_files(collection_name)
+    if existing is not None:
+        set_ingested_files(collection_name, existing + list(filenames))
@@ -33,31 +33,24 @@ class RecursiveCharacterTextSplitter:
         return len(text)
 
     def _merge_splits(self, splits: List[str], separator: str) -> List[str]:
+        # Greedily pack consecutive splits into docs of at most chunk_size.
+        # Each doc starts empty, so no overlap bookkeeping is needed here.
         docs = []
         current_doc = []
         total = 0
+        sep_len = len(separator)
+        chunk_size = self.chunk_size
         for d in splits:
-            _len = self._length_function(d)
-            if total + _len + (len(separator) if current_doc else 0) > self.chunk_size:
-                if total > self.chunk_size:
-                    # If a single split is larger than chunk_size, we might need to recurse on it
-                    pass # Simplified: just keeping it or we could recurse. 
-                
-                if current_doc:
-                    doc = separator.join(current_doc)
-                    if doc:
-                        docs.append(doc)
-                
-                # Handling overlap (simplified)
-                while total > self.chunk_overlap or (total + _len > self.chunk_size and total > 0):
-                     total -= self._length_function(current_doc[0]) + len(separator)
-                     current_doc.pop(0)
-
+            _len = len(d)
+            if current_doc and total + _len + sep_len > chunk_size:
+                doc = separator.join(current_doc)
+                if doc:
+                    docs.append(doc)
                 current_doc = []
                 total = 0
             
             current_doc.append(d)
-            total += _len + (len(separator) if len(current_doc) > 1 else 0)
+            total += _len + (sep_len if len(current_doc) > 1 else 0)
         
         doc = separator.join(current_doc)
         if doc:
@@ -1,15 +1,42 @@
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from app.core.config import settings
 from app.routers import fundamentals, rag
 from app.core.exceptions import AIModelError, ai_model_exception_handler, generic_exception_handler
+from app.services import prompt_engine
+from app.services.ai_providers import AIServiceFactory
+from app.services.model_registry import ModelRegistry
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load model selections and warm both slots (clients + local models) before serving,
+    # so the first request doesn't pay for a cold start
+    registry = ModelRegistry.instance()
+    await asyncio.to_thread(registry.initialize, settings.GEMINI_API_KEY, settings.OLLAMA_BASE_URL)
+    results = await asyncio.gather(
+        prompt_engine.warmup_slot(1, preload=True),
+        prompt_engine.warmup_slot(2, preload=True),
+        return_exceptions=True
+    )
+    for slot, result in enumerate(results, start=1):
+        if isinstance(result, Exception):
+            print(f"⚠️ Warmup of model slot {slot} skipped: {result}")
+    yield
+    await AIServiceFactory.aclose_all()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="Professional AI Backend for specialized role-based learning."
+    description="Professional AI Backend for specialized role-based learning.",
+    lifespan=lifespan
 )
 
+# Compress larger (multi-KB LLM answer) responses; level 4 keeps CPU per response low
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 # Exception Handlers
 app.add_exception_handler(AIModelError, ai_model_exception_handler)
 app.add_exception_handler(Exception, generic_exception_handler)
@@ -24,4 +51,4 @@ def root():
 
 if __name__ == "__main__":
     # This allows you to run python main.py
-    uvicorn.run("main:app", host="localhost", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", host=settings.HOST, port=settings.PORT, reload=True)
\ No newline at end of file
@@ -1,5 +1,20 @@
 import streamlit as st
+import atexit
 import importlib
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Log records are handed to a background thread, so a slow stderr never
+# blocks the code that logged. Streamlit reruns this script: set up only once.
+# Third-party libraries (httpx logs every request at INFO) stay at WARNING.
+if not logging.getLogger().handlers:
+    _log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, logging.StreamHandler())
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logging.basicConfig(level=logging.WARNING, handlers=[QueueHandler(_log_queue)])
+    logging.getLogger("shared").setLevel(logging.INFO)
 
 # Configure Page
 st.set_page_config(
@@ -1,11 +1,138 @@
 import os
-from typing import List, Generator, Any
+import json
+import logging
+import asyncio
+import hashlib
+import weakref
+import functools
+from collections import OrderedDict
+from typing import Dict, List, Generator, Any, Optional, Tuple, Union
 from dotenv import load_dotenv
-from litellm import completion, embedding
+from litellm import completion, acompletion, embedding, aembedding
 
 # Auto-load .env from PWD (root)
 load_dotenv()
 from shared.settings import settings
+from shared.semantic_cache import SemanticCache
+
+try:
+    import tiktoken  # Rust-backed local tokenizer, used for the prompt length check
+except ImportError:
+    tiktoken = None
+
+log = logging.getLogger("shared.llm")
+
+
+# In-flight chat_async calls, keyed by (event loop, request hash), for single-flight coalescing
+_inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+# Concurrency cap per model, and the semaphores enforcing it (per event loop, since
+# asyncio primitives can't be shared across loops)
+_MODEL_CONCURRENCY = {
+    settings.MODEL_3: settings.MAX_CONCURRENCY_MODEL_3,
+    settings.MODEL_2: settings.MAX_CONCURRENCY_MODEL_2,
+    settings.MODEL_1: settings.MAX_CONCURRENCY_MODEL_1,
+}
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _get_limit(model_name: str) -> asyncio.Semaphore:
+    semaphores = _limits.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(model_name)
+    if semaphore is None:
+        limit = _MODEL_CONCURRENCY.get(model_name, settings.MAX_CONCURRENCY_DEFAULT)
+        semaphore = semaphores[model_name] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+# Extra litellm arguments per provider (the part of the model name before "/")
+_PROVIDER_KWARGS = {"ollama": {"api_base": settings.OLLAMA_BASE_URL}}
+_NO_KWARGS: Dict[str, Any] = {}
+
+
+def _provider_kwargs(model_name: str) -> Dict[str, Any]:
+    return _PROVIDER_KWARGS.get(model_name.split("/", 1)[0], _NO_KWARGS)
+
+
+# Slot maps are derived once: settings are loaded at import and not changed at runtime
+_SETTINGS_VALUES = settings.model_dump()
+_MODEL_SLOTS = {k: v for k, v in _SETTINGS_VALUES.items() if k.startswith("MODEL_") and v}
+_EMBEDDING_SLOTS = {k: v for k, v in _SETTINGS_VALUES.items() if k.startswith("EMBED_") and v}
+
+
+def _semantic_cache_text(messages: List[dict]) -> Optional[str]:
+    """
+    Text to key the semantic cache on, or None if the request must bypass it.
+    Only single-message requests are cached: in a multi-turn chat each turn's
+    text is mostly the previous turn's, so it would hit the previous answer.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED or len(messages) != 1:
+        return None
+    return f"{messages[0]['role']}: {messages[0]['content']}"
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoder():
+    # Loaded lazily: the first get_encoding call may fetch the BPE file.
+    # A failure (e.g. offline) is cached as None so it isn't retried per call.
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        log.warning("tiktoken encoder unavailable; prompt length check disabled", exc_info=True)
+        return None
+
+
+def _check_prompt_length(model_name: str, messages: List[dict]) -> Optional[str]:
+    """
+    Count prompt tokens locally and return an error message if the prompt is
+    over MAX_PROMPT_TOKENS, so it is rejected without a network round-trip.
+    Opt-in, because tiktoken downloads its BPE file (without a timeout) on first
+    use, which a local-only setup shouldn't pay for in the middle of a chat call.
+    cl100k_base only approximates non-OpenAI tokenizers; close calls pass through.
+    Fails open: if anything goes wrong the prompt is sent as usual.
+    """
+    limit = settings.MAX_PROMPT_TOKENS
+    if not limit or tiktoken is None:
+        return None
+    try:
+        encoder = _get_encoder()
+        if encoder is None:
+            return None
+        # encode_ordinary: user text containing "<|endoftext|>" etc. is counted, not rejected
+        tokens = sum(len(encoder.encode_ordinary(m["content"])) for m in messages)
+    except Exception:
+        log.warning("Prompt length check skipped model=%s", model_name, exc_info=True)
+        return None
+    if tokens <= limit:
+        return None
+    return f"Error: Prompt is about {tokens} tokens, over the {limit}-token limit of {model_name}."
+
+
+# Maximum number of inputs per embedding request (Gemini caps batches at 100)
+EMBED_BATCH_SIZE = 96
+
+# Embeddings are deterministic per (model, text), so single-string results are
+# memoized in an LRU shared by embed() and embed_async(); errors are never cached
+EMBED_CACHE_SIZE = 4096
+_embed_cache: "OrderedDict[Tuple[str, str], Tuple[float, ...]]" = OrderedDict()
+
+
+def _cached_embedding(key: Tuple[str, str]) -> Optional[List[float]]:
+    try:
+        _embed_cache.move_to_end(key)
+        return list(_embed_cache[key])
+    except KeyError:
+        return None
+
+
+def _cache_embedding(key: Tuple[str, str], vector: List[float]):
+    _embed_cache[key] = tuple(vector)
+    while len(_embed_cache) > EMBED_CACHE_SIZE:
+        try:
+            _embed_cache.popitem(last=False)
+        except KeyError:
+            break
+
 
 class LLMEngine:
     """
@@ -17,10 +144,7 @@ class LLMEngine:
         Returns the configured model slots from settings.
         Dynamically finds all settings starting with MODEL_
         """
-        return {
-            k: v for k, v in settings.model_dump().items() 
-            if k.startswith("MODEL_") and v
-        }
+        return dict(_MODEL_SLOTS)
 
     @staticmethod
     def get_embedding_slots():
@@ -28,25 +152,65 @@ class LLMEngine:
         Returns the configured embedding slots from settings.
         Dynamically finds all settings starting with EMBED_
         """
-        return {
-            k: v for k, v in settings.model_dump().items() 
-            if k.startswith("EMBED_") and v
-        }
+        return dict(_EMBEDDING_SLOTS)
 
     @staticmethod
-    def embed(model_name: str, input: Any) -> List[float]:
+    def embed(model_name: str, input: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """
         Universal embedding function.
+        A string returns its vector; a list of strings returns one vector per
+        input, requested in batches of EMBED_BATCH_SIZE.
         """
+        if isinstance(input, str):
+            key = (model_name, input)
+            cached = _cached_embedding(key)
+            if cached is not None:
+                return cached
         try:
-            kwargs = {}
-            if model_name.startswith("ollama/"):
-                kwargs["api_base"] = settings.OLLAMA_BASE_URL
+            kwargs = _provider_kwargs(model_name)
 
-            response = embedding(model=model_name, input=input, **kwargs)
-            return response["data"][0]["embedding"]
-        except Exception as e:
-            print(f"Embedding Error: {e}")
+            if isinstance(input, str):
+                response = embedding(model=model_name, input=input, **kwargs)
+                vector = response["data"][0]["embedding"]
+                _cache_embedding(key, vector)
+                return vector
+
+            vectors = []
+            for i in range(0, len(input), EMBED_BATCH_SIZE):
+                response = embedding(model=model_name, input=input[i:i + EMBED_BATCH_SIZE], **kwargs)
+                vectors.extend(d["embedding"] for d in response["data"])
+            return vectors
+        except Exception:
+            log.exception("Embedding failed model=%s", model_name)
+            return []
+
+    @staticmethod
+    async def embed_async(model_name: str, input: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        """
+        Async embedding via litellm.aembedding (same semantics and cache as embed()).
+        Batches of a list input are requested concurrently.
+        """
+        if isinstance(input, str):
+            key = (model_name, input)
+            cached = _cached_embedding(key)
+            if cached is not None:
+                return cached
+        try:
+            kwargs = _provider_kwargs(model_name)
+
+            if isinstance(input, str):
+                response = await aembedding(model=model_name, input=input, **kwargs)
+                vector = response["data"][0]["embedding"]
+                _cache_embedding(key, vector)
+                return vector
+
+            responses = await asyncio.gather(*(
+                aembedding(model=model_name, input=input[i:i + EMBED_BATCH_SIZE], **kwargs)
+                for i in range(0, len(input), EMBED_BATCH_SIZE)
+            ))
+            return [d["embedding"] for response in responses for d in response["data"]]
+        except Exception:
+            log.exception("Embedding failed model=%s", model_name)
             return []
 
     @staticmethod
@@ -56,10 +220,21 @@ class LLMEngine:
         If stream=False (default): returns just the content string.
         If stream=True: returns a generator for streaming.
         """
+        too_long = _check_prompt_length(model_name, messages)
+        if too_long:
+            return too_long
+
+        # Near-duplicate single prompts are answered from the semantic cache
+        cache_key = None
+        cache_text = None if stream else _semantic_cache_text(messages)
+        if cache_text:
+            cache_key = LLMEngine.embed(settings.EMBED_1, cache_text)
+            cached = SemanticCache.lookup(model_name, temperature, cache_key)
+            if cached is not None:
+                return cached
+
         try:
-            kwargs = {}
-            if model_name.startswith("ollama/"):
-                kwargs["api_base"] = settings.OLLAMA_BASE_URL
+            kwargs = _provider_kwargs(model_name)
 
             response = completion(
                 model=model_name,
@@ -72,10 +247,89 @@ class LLMEngine:
             if stream:
                 return response
             else:
-                return response.choices[0].message.content
+                content = response.choices[0].message.content
+                if cache_key:
+                    SemanticCache.store(model_name, temperature, cache_key, content)
+                return content
         except Exception as e:
+            log.exception("Chat failed model=%s", model_name)
             # Return error as a string for UI handling
-            return f"Error: {str(e)}"
+            return f"Error: {e}"
+
+    @staticmethod
+    async def chat_async(model_name: str, messages: List[dict], temperature: float = 0.7) -> str:
+        """
+        Non-streaming chat on litellm's native async client, so concurrent
+        calls don't each tie up a thread. Returns the content string.
+        Identical requests already in flight on this event loop share one call.
+        """
+        loop = asyncio.get_running_loop()
+        request_hash = hashlib.blake2b(
+            f"{model_name}|{temperature}|{json.dumps(messages, sort_keys=True)}".encode(), digest_size=16
+        ).hexdigest()
+        key = (loop, request_hash)
+
+        pending = _inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        _inflight[key] = future
+        try:
+            content = await LLMEngine._chat_async(model_name, messages, temperature)
+            future.set_result(content)
+            return content
+        finally:
+            _inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    @staticmethod
+    async def _chat_async(model_name: str, messages: List[dict], temperature: float) -> str:
+        too_long = _check_prompt_length(model_name, messages)
+        if too_long:
+            return too_long
+
+        cache_key = None
+        cache_text = _semantic_cache_text(messages)
+        if cache_text:
+            cache_key = await LLMEngine.embed_async(settings.EMBED_1, cache_text)
+            # SQLite I/O and the similarity scan run off the event loop
+            cached = await asyncio.to_thread(SemanticCache.lookup, model_name, temperature, cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            kwargs = _provider_kwargs(model_name)
+
+            async with _get_limit(model_name):
+                response = await acompletion(
+                    model=model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    **kwargs
+                )
+            content = response.choices[0].message.content
+            if cache_key:
+                await asyncio.to_thread(SemanticCache.store, model_name, temperature, cache_key, content)
+            return content
+        except Exception as e:
+            log.exception("Chat failed model=%s", model_name)
+            return f"Error: {e}"
+
+    @staticmethod
+    async def chat_batch(model_name: str, conversations: List[List[dict]], temperature: float = 0.7, max_concurrency: int = 5) -> List[str]:
+        """
+        Run several independent conversations concurrently (at most max_concurrency in flight).
+        Returns one content string per conversation, in order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(messages: List[dict]) -> str:
+            async with semaphore:
+                return await LLMEngine.chat_async(model_name, messages, temperature)
+
+        return await asyncio.gather(*(run_one(m) for m in conversations))
 
 # Singleton instance if needed, or just use static methods
 engine = LLMEngine()
@@ -0,0 +1,137 @@
+"""
+Semantic response cache for LLMEngine.chat.
+
+Answered conversations are stored in a local SQLite database together with
+the (normalized) embedding of their text. A later conversation whose embedding
+has cosine similarity >= SEMANTIC_CACHE_THRESHOLD with a stored one, for the
+same model and temperature, is answered from the cache without a model call.
+Entries expire after SEMANTIC_CACHE_TTL_SECONDS, and at most
+SEMANTIC_CACHE_MAX_ENTRIES (the newest) are kept per model and temperature.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from shared.settings import settings
+
+log = logging.getLogger("shared.semantic_cache")
+
+
+class _Entries(NamedTuple):
+    """Cached responses for one (model, temperature), oldest first. Replaced, never mutated."""
+    matrix: np.ndarray      # (N, D) float32, one normalized embedding per row
+    contents: List[str]
+    created_at: np.ndarray  # (N,) float64
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class SemanticCache:
+    """
+    Embedding-keyed cache of chat completions.
+    Entries are loaded from SQLite once per (model, temperature) and searched in memory.
+    Cache failures never fail the chat call; they only cost a miss.
+    """
+    _conn: Optional[sqlite3.Connection] = None
+    _entries: Dict[Tuple[str, float], _Entries] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_conn(cls) -> sqlite3.Connection:
+        if cls._conn is None:
+            os.makedirs(os.path.dirname(settings.SEMANTIC_CACHE_PATH) or ".", exist_ok=True)
+            cls._conn = sqlite3.connect(settings.SEMANTIC_CACHE_PATH, check_same_thread=False)
+            cls._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "model_name TEXT, temperature REAL, embedding BLOB, content TEXT, created_at REAL)"
+            )
+        return cls._conn
+
+    @classmethod
+    def _get_entries(cls, model_name: str, temperature: float) -> _Entries:
+        key = (model_name, temperature)
+        if key not in cls._entries:
+            rows = cls._get_conn().execute(
+                "SELECT embedding, content, created_at FROM responses"
+                " WHERE model_name = ? AND temperature = ? AND created_at >= ?"
+                " ORDER BY created_at DESC LIMIT ?",
+                (model_name, temperature, time.time() - settings.SEMANTIC_CACHE_TTL_SECONDS,
+                 settings.SEMANTIC_CACHE_MAX_ENTRIES)
+            ).fetchall()
+            # Rows from an older embedding model (different dimension) are skipped
+            vectors = [np.frombuffer(blob, dtype=np.float32) for blob, _, _ in rows]
+            dim = len(vectors[0]) if vectors else 0
+            keep = [i for i, v in enumerate(vectors) if len(v) == dim][::-1]
+            cls._entries[key] = _Entries(
+                matrix=np.array([vectors[i] for i in keep], dtype=np.float32).reshape(len(keep), dim),
+                contents=[rows[i][1] for i in keep],
+                created_at=np.array([rows[i][2] for i in keep], dtype=np.float64)
+            )
+        return cls._entries[key]
+
+    @classmethod
+    def lookup(cls, model_name: str, temperature: float, embedding: List[float]) -> Optional[str]:
+        """Return the cached response closest to this embedding, if it is similar enough."""
+        if not embedding:
+            return None
+        try:
+            query = _normalize(embedding)
+            with cls._lock:
+                entries = cls._get_entries(model_name, temperature)
+            # Scored outside the lock: entries are replaced on store, never mutated
+            if not entries.contents or entries.matrix.shape[1] != len(query):
+                return None
+            scores = entries.matrix @ query
+            scores[entries.created_at < time.time() - settings.SEMANTIC_CACHE_TTL_SECONDS] = -1.0
+            best = int(np.argmax(scores))
+            return entries.contents[best] if scores[best] >= settings.SEMANTIC_CACHE_THRESHOLD else None
+        except Exception:
+            log.exception("Semantic cache lookup failed model=%s", model_name)
+            return None
+
+    @classmethod
+    def store(cls, model_name: str, temperature: float, embedding: List[float], content: str):
+        """Add a response to the cache, dropping expired and over-limit entries."""
+        if not embedding or not content:
+            return
+        try:
+            vector = _normalize(embedding)
+            now = time.time()
+            cutoff = now - settings.SEMANTIC_CACHE_TTL_SECONDS
+            limit = settings.SEMANTIC_CACHE_MAX_ENTRIES
+            with cls._lock:
+                # Loaded before the insert, so the new row isn't read back and then appended again
+                entries = cls._get_entries(model_name, temperature)
+                conn = cls._get_conn()
+                with conn:
+                    conn.execute(
+                        "INSERT INTO responses VALUES (?, ?, ?, ?, ?)",
+                        (model_name, temperature, vector.tobytes(), content, now)
+                    )
+                    conn.execute(
+                        "DELETE FROM responses WHERE model_name = ? AND temperature = ? AND (created_at < ?"
+                        " OR rowid NOT IN (SELECT rowid FROM responses WHERE model_name = ? AND temperature = ?"
+                        " ORDER BY created_at DESC LIMIT ?))",
+                        (model_name, temperature, cutoff, model_name, temperature, limit)
+                    )
+                if entries.matrix.shape[1] != len(vector):
+                    # Embedding model changed: older vectors can't be compared with new ones
+                    entries = _Entries(np.empty((0, len(vector)), dtype=np.float32), [], np.empty(0))
+                live = np.flatnonzero(entries.created_at >= cutoff)
+                live = live[max(len(live) - (limit - 1), 0):]
+                cls._entries[(model_name, temperature)] = _Entries(
+                    matrix=np.vstack([entries.matrix[live], vector[None, :]]),
+                    contents=[entries.contents[i] for i in live] + [content],
+                    created_at=np.append(entries.created_at[live], now)
+                )
+        except Exception:
+            log.exception("Semantic cache store failed model=%s", model_name)
@@ -1,6 +1,13 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
+    # Read once from the environment/.env; frozen so nothing can mutate it at runtime
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore", # Ignore other keys in .env
+        frozen=True
+    )
+
     # API Keys
     GEMINI_API_KEY: str = ""
     OLLAMA_BASE_URL: str = "http://localhost:11434"
@@ -15,9 +22,21 @@ class Settings(BaseSettings):
     EMBED_2: str = "ollama/nomic-embed-text"
     EMBED_3: str = "ollama/embeddinggemma"
 
-    class Config:
-        env_file = ".env"
-        extra = "ignore" # Ignore other keys in .env
+    # Maximum concurrent async chat calls per model slot (other models use the default)
+    MAX_CONCURRENCY_MODEL_1: int = 10
+    MAX_CONCURRENCY_MODEL_2: int = 4
+    MAX_CONCURRENCY_MODEL_3: int = 4
+    MAX_CONCURRENCY_DEFAULT: int = 4
+
+    # Prompts over this many tokens are rejected before the call (0 = no local check)
+    MAX_PROMPT_TOKENS: int = 0
+
+    # Semantic Response Cache (keys are embedded with EMBED_1)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92 # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_PATH: str = "./data/semantic_cache.sqlite3"
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000 # Newest responses kept per model and temperature
+    SEMANTIC_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
 
 # Singleton Instance
 settings = Settings()